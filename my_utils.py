@@ -14,6 +14,7 @@ from sklearn.preprocessing import *
 from sklearn.feature_extraction.text import *
 from sklearn.metrics import silhouette_score
 from sklearn.utils import Bunch
+from scipy.sparse import issparse, csr_matrix
 from dataclasses import dataclass, field
 from typing import Tuple, Iterable, Union
 from queue import PriorityQueue
@@ -21,9 +22,8 @@ from pprint import pprint
 import sys,os,time
 import logging
 from datetime import datetime
-from pyqtgraph.Qt import QtCore, QtGui
+# NOTE: pyqtgraph (Qt) is only imported by the functions that use it
 #import pyqtgraph.opengl as gl
-import pyqtgraph as pg
 from collections import deque, OrderedDict
 import pandas as pd
 
@@ -135,9 +135,15 @@ def count_zero_columns (M : np.ndarray):
     return zero_cols.shape[0]
 
 #def print_silhouette_score (data, row_labels, column_labels, logger=logging.getLogger(__name__)):
-def print_silhouette_score (data, row_labels, column_labels, metric="cosine", logger=None):
-    sil_score_row = silhouette_score(data, row_labels, metric=metric)
-    sil_score_col = silhouette_score(data.T, column_labels, metric=metric)
+def print_silhouette_score (data, row_labels, column_labels, metric="cosine", logger=None, 
+                            scores=None, sample_size=None, random_state=None):
+    """Print (and return) the row and column silhouette scores. If scores (row, col) are given 
+    (e.g. already calculated while fitting), they are just printed."""
+    if scores is None:
+        sil_score_row = silhouette_score(data, row_labels, metric=metric, sample_size=sample_size, random_state=random_state)
+        sil_score_col = silhouette_score(data.T, column_labels, metric=metric, sample_size=sample_size, random_state=random_state)
+    else:
+        sil_score_row, sil_score_col = scores
     row_labels_bin, col_labels_bin = np.bincount(row_labels), np.bincount(column_labels)
     results_message = f"\nrow label count: {row_labels_bin}\ncol label count: {col_labels_bin}\nsilhouette score:\n\trows: {sil_score_row:.3f}\n\tcols: {sil_score_col:.3f}\n"
     if logger:
@@ -152,6 +158,10 @@ def bic_boolean_to_labels (bic):
     row_labels, col_labels = labelize(rows), labelize(cols)
     return row_labels, col_labels
 
+def densify (X):
+    """Dense version of X (for plotting); X itself if it is already dense."""
+    return X.toarray() if issparse(X) else X
+
 def plot_matrices(matrices : Iterable, names : Iterable, 
                     timer=None, savefig : str = None, aspect_ratio=1):
     """
@@ -259,13 +269,19 @@ def shade_coclusters (data, row_col_labels : Tuple[int], cluster_assoc, RNG=None
     plt.legend(handles, labels, bbox_to_anchor=(1.01,1), loc="upper left") # 1.04,1
 
 def get_centroids_by_cluster (data, labels, n_clusters):
+    labels = np.asarray(labels)
     n_smp, n_dim = data.shape
-    centroids = np.zeros((n_dim, n_clusters), dtype=np.float64)
-
-    for k in range(n_clusters):
-        mask = (labels == k)
-        centroids[:, k] = np.mean(data[mask, :], axis=0)
-    return centroids
+    # keep float32 data in float32 (integer data, e.g. counts, still gets float64 means)
+    dtype = np.result_type(data.dtype, np.float32)
+
+    # all cluster sums in a single pass: (n_clusters, n_smp) indicator matrix times data
+    indicator = csr_matrix((np.ones(n_smp, dtype=dtype), (labels, np.arange(n_smp))), shape=(n_clusters, n_smp))
+    sums = indicator @ data
+    sums = sums.toarray() if issparse(sums) else sums
+    counts = np.bincount(labels, minlength=n_clusters)
+    with np.errstate(invalid="ignore"): # empty clusters get nan (as the mean of an empty slice would)
+        centroids = (sums / counts[:, None]).T
+    return np.ascontiguousarray(centroids, dtype=dtype)
 
 def centroid_scatter_plot (members, centroids, labels, basis_vectors=None, 
     title="Reduced-dimension scatter plot", pca=None, palette=None, centroid_size=400, 
@@ -285,7 +301,7 @@ def centroid_scatter_plot (members, centroids, labels, basis_vectors=None,
         color_registry = mcolors.CSS4_COLORS
 
     # normalize before PCA
-    normalized_members = normalize(members, axis=1)
+    normalized_members = densify(normalize(members, axis=1))
     normalized_centroids = normalize(centroids.T, axis=1) if normalize_centroids else centroids.T
     points = np.vstack([normalized_members, normalized_centroids])
 
@@ -379,6 +395,8 @@ def adjust_column_width (dataframe, writer, sheet_name):
         writer.sheets[sheet_name].set_column(col_idx, col_idx, col_width) # set width of a range of columns
 
 def init_qt_graphics(data_matrix):
+    from pyqtgraph.Qt import QtGui
+    import pyqtgraph as pg
     app = pg.mkQApp()
     win = pg.GraphicsLayoutWidget()
     win.resize(1400,800)
@@ -423,24 +441,23 @@ def init_qt_graphics(data_matrix):
     
     return app, win, im2, anchor2
     
-def update_display(history : deque, display, anchor):
+def update_display(model, display, anchor):
     if anchor.timer:
         anchor.timer -=1
     else:
-        actual_history_len = len(history)
-        #next_matrix = history.popleft()
-        R,B,C = history.popleft()
+        history_len = len(model.best_history)
+        R,B,C = model.get_iteration(anchor.i)
         next_matrix = R@B@C
         display.setImage(next_matrix)
         anchor.setText(str(anchor.i))
-        anchor.i = (anchor.i+1) % actual_history_len
-        history.append((R,B,C)) # loop history!  
+        anchor.i = (anchor.i+1) % history_len # loop history!
         if anchor.i == 0: # stop for a bit at the final one
-            anchor.timer = len(history)//3
+            anchor.timer = history_len//3
 
 def pyqtgraph_thing (data, model, ms_period):
+    from pyqtgraph.Qt import QtCore
     app, win, im, anchor = init_qt_graphics(data)
-    my_update = lambda : update_display(model.best_history, im, anchor)
+    my_update = lambda : update_display(model, im, anchor)
     time = QtCore.QTimer()
     time.timeout.connect(my_update)
     time.start(ms_period)
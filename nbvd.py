@@ -3,15 +3,25 @@
 import numpy as np
 from numpy.linalg import norm
 from numpy.random import default_rng
-from sklearn.metrics import silhouette_score, pairwise_distances_argmin
+from scipy.sparse import issparse, csr_matrix
+from sklearn import config_context
+from sklearn.metrics import silhouette_score, pairwise_distances, pairwise_distances_argmin
+from sklearn.utils.extmath import randomized_svd
+from joblib import Parallel, delayed
 from dataclasses import dataclass, field
-from collections import deque
 import logging
 from typing import Tuple
 from my_utils import *
 
 DEFAULT_NBVD_LABELING_METHOD = "fancy"
 SILHOUETTE_METRIC = "cosine"
+EARLY_STOP_PATIENCE = 3 # stop after this many consecutive iterations with relative improvement < tol (if tol > 0)
+EARLY_STOP_MIN_ITER = 100 # ...but never before this many iterations (random inits start with a long flat stretch)
+WARMUP_ITER = 50 # with more than WARMUP_KEEP attempts, run all of them for WARMUP_ITER iterations...
+WARMUP_KEEP = 2 # ...and only continue the WARMUP_KEEP ones with the lowest norm
+SILHOUETTE_NORM_MARGIN = 1.1 # attempts with norm > margin * (lowest norm among attempts) skip the silhouette
+SILHOUETTE_SAMPLE_SIZE = 2000 # estimate silhouette on a sample of this many rows/columns when their distances don't fit...
+SILHOUETTE_WORKING_MEMORY = 512 # MiB; ...in this (also the size of the distance chunks sklearn streams through)
 
 @dataclass(eq=False)
 class NBVD_coclustering:
@@ -21,15 +31,18 @@ class NBVD_coclustering:
     n_col_clusters: int
     symmetric: bool = False
     iter_max: int = 2000 # 2000
+    tol: float = 1e-6 # relative norm improvement below which an iteration counts as stalled (0: stop once the norm goes up)
     n_attempts: int = 5
+    n_jobs: int = 1 # processes used to run the attempts (joblib convention); NOTE: each worker gets a pickled copy of the estimator (data included), so only worth it for long fits
+    init: str = "nndsvd" # initialization for the first attempt ("nndsvd" or "random"); the others are random
     random_state: int = None
     verbose: bool = False
     save_history: bool = False
     save_norm_history: bool = False
     logger : logging.Logger = None
+    dtype: type = np.float32 # dtype for the data and R,B,C (float32 halves memory traffic)
 
     # properties calculated post init
-    Z: np.ndarray = field(init=False)
     biclusters_: np.ndarray = field(init=False)
     row_labels_: np.ndarray = field(init=False)
     column_labels_: np.ndarray = field(init=False)
@@ -40,14 +53,17 @@ class NBVD_coclustering:
     B: np.ndarray = field(init=False)
     C: np.ndarray = field(init=False)
     S: np.ndarray = field(init=False)
+    RB: np.ndarray = field(init=False)
     best_norm: int = field(init=False)
+    best_labels: Tuple[np.ndarray] = field(init=False)
+    best_silhouette: MeanTuple = field(init=False)
 
     def print_or_log(self, s):
         if self.logger:
             self.logger.info(s)
         else:
             print(s)
-    def get_basis_vectors (R,B,C):
+    def get_basis_vectors (R,B,C, RB=None):
         # R = (n,k)
         # B = (k,l)
         # C = (l,m)
@@ -56,7 +72,7 @@ class NBVD_coclustering:
         # (BC).T = (m,k)
         ##      k row prototype vectors (basis vectors for Z's row space)
 
-        col_basis = R @ B
+        col_basis = RB if RB is not None else R @ B # reuse R@B from the last iteration if we have it
         row_basis = (B @ C).T
         return (row_basis, col_basis)
     
@@ -69,6 +85,9 @@ class NBVD_coclustering:
 
     def get_labels_new_data (Z, centers, n_centroids, centroid_dim, other_centroid_dim, 
                             R=None, C=None, metric="cosine"):
+        if metric == "cosine":
+            # NOTE: cosine argmin == argmax of Z @ normalized centers (one sparse matmul)
+            return np.asarray(np.argmax(Z @ normalize(centers.T).T, axis=1)).ravel()
         labels = pairwise_distances_argmin(Z, centers.T, metric=metric)
         return labels
 
@@ -78,27 +97,23 @@ class NBVD_coclustering:
             row_adh = R
             col_adh = C.T
         elif method == "fancy":
-            # TODO: this only works if n_row_clusters == n_col_clusters, possibly because of TODO below
             if B is None:
                 raise Exception(f"[NBVD.get_adherence] ERROR: B is None")
 
             # NOTE: this algorithm requires sum(X) == 1, 
             #  so we will simulate that by dividing B by xsum
-            xsum  = np.sum(R@B@C)
-            U = R.copy()
+            # NOTE: sum(R@B@C) == (1.T@R) @ B @ (C@1), so the (n,m) product is never formed
+            xsum = (R.sum(axis=0) @ B) @ C.sum(axis=1)
+            U = R # no copies needed: U and V are only read
             S = B / xsum
-            V = C.T.copy()
-            diag = lambda M : np.diag(np.diag(M))
-            Du = diag(np.ones(U.shape).T @ U) # U@Du^-1 has all columns sum to one
-            Dv = diag(np.ones(V.shape).T @ V) # V@Dv^-1 has all columns sum to on
-
-            # TODO: maybe this and below should be np.ones((k,l))
-            U = U @ diag(S @ Dv @ np.ones(Dv.shape)) 
-            V = V @ diag(np.ones(Du.shape).T @ Du @ S)
+            V = C.T
+            du = U.sum(axis=0) # diagonal of Du; U@Du^-1 has all columns sum to one
+            dv = V.sum(axis=0) # diagonal of Dv; V@Dv^-1 has all columns sum to one
 
             # U is associated with rows; V is associated with columns
-            row_adh = U 
-            col_adh = V
+            # NOTE: multiplying by a diagonal matrix is just scaling the columns
+            row_adh = U * (S @ dv)[None, :]
+            col_adh = V * (du @ S)[None, :]
         return (row_adh, col_adh)
 
     def get_labels_bicluster (R, C, B=None, Z=None, centroids=None, method="fancy"):
@@ -120,108 +135,322 @@ class NBVD_coclustering:
             row = np.argmax(row_adh, axis=1)
             col = np.argmax(col_adh, axis=1)
 
-        zeros_row = np.zeros((n,k))
-        _, j_idx = np.mgrid[slice(zeros_row.shape[0]), slice(zeros_row.shape[1])] # prefer anything over for loop
-        row_mod = row.reshape((n,1)).repeat(k, axis=1)
-        bic_rows = np.where((j_idx == row_mod) , True, False)
-
-        zeros_col = np.zeros((l,m))
-        i_idx, _ = np.mgrid[slice(zeros_col.shape[0]), slice(zeros_col.shape[1])] # prefer anything over for loop
-        col_mod = col.reshape((m,1)).repeat(k, axis=1)
-        bic_cols = np.where((i_idx.T == col_mod) , True, False)
+        # one-hot encode labels via broadcasting
+        bic_rows = (row[:, None] == np.arange(k)[None, :])
+        bic_cols = (col[:, None] == np.arange(l)[None, :])
         bic = (bic_rows.T, bic_cols.T)
         return (bic, row, col)
 
     def get_cluster_assoc (R,B,C):
         """Get co-cluster structure from factorization results."""
-        k, l = B.shape
         B_row_avg = np.average(B, axis=1) # NOTE: chosen so that each document cluster is associated w/ something
-        return (B >= B_row_avg.reshape((k,1)).repeat(l, axis=1))
+        return (B >= B_row_avg[:, None])
+
+    def get_buffers (n, m, k, l, dtype=np.float64, Z64=None):
+        """Preallocate outputs for the products in attempt_coclustering_aux that scale with n or m,
+        so they can be reused across iterations. (The symmetric case has n == m and k == l
+        and reuses the same buffers.) With Z64 (a float64 copy of sparse float32 data), 
+        RB.T@Z is taken from it and kept in float64."""
+        buf = Bunch(
+            ZCt=np.empty((n,l), dtype=dtype), num_R=np.empty((n,k), dtype=dtype), den_R=np.empty((n,k), dtype=dtype), 
+            RB=np.empty((n,l), dtype=dtype), RBtZ=np.empty((l,m), dtype=dtype), den_C=np.empty((l,m), dtype=dtype)
+        )
+        if Z64 is not None:
+            buf.Z64, buf.RBtZ = Z64, np.empty((l,m), dtype=np.float64)
+        return buf
+
+    def matmul (X, Y, out):
+        """np.matmul(X, Y, out=out), which also accepts a sparse X or Y (np.matmul itself doesn't)."""
+        if issparse(X) or issparse(Y):
+            out[:,:] = X @ Y
+            return out
+        return np.matmul(X, Y, out=out)
+
+    def attempt_coclustering_aux(Z,R,B,C, symmetric, Z_norm2, buf):
+        """Do one round of multiplicative updates (in place) and return the reconstruction norm.
+        Shared products are computed once and only recomputed when one of their factors changes;
+        the elementwise 'X = X * num / den' steps use in-place ufuncs and the large products 
+        are written into the preallocated buffers in buf (see get_buffers), so they allocate nothing.
 
-    def attempt_coclustering_aux(Z,R,B,C, symmetric):
+        The norm uses ||RBC-Z||^2 = ||Z||^2 - 2<Z,RBC> + ||RBC||^2 (Z_norm2 = ||Z||^2),
+        so the (n,m) reconstruction is never materialized; its small trace terms are taken in float64."""
         if not symmetric:
-            R[:,:] = R[:,:] * (Z@C.T@B.T)[:,:] / (R@B@C@C.T@B.T)[:,:]
-            B[:,:] = B[:,:] * (R.T@Z@C.T)[:,:] / (R.T@R@B@C@C.T)[:,:]
-            C[:,:] = C[:,:] * (B.T@R.T@Z)[:,:] / (B.T@R.T@R@B@C)[:,:]
+            # C is fixed while R and B are updated
+            CCt = C @ C.T
+            ZCt = NBVD_coclustering.matmul(Z, C.T, out=buf.ZCt)
+            den = np.matmul(R, B @ CCt @ B.T, out=buf.den_R)
+            R *= np.matmul(ZCt, B.T, out=buf.num_R)
+            R /= den
+            RtR = R.T @ R
+            den = RtR @ B @ CCt
+            B *= R.T @ ZCt
+            B /= den
+            RB = np.matmul(R, B, out=buf.RB)
+            if "Z64" in buf:
+                # only Z's nonzeros enter RB.T@Z, so it's cheap to do in float64 (it's reused for the cross term)
+                RBtZ = NBVD_coclustering.matmul(RB.T.astype(np.float64), buf.Z64, out=buf.RBtZ)
+            else:
+                RBtZ = NBVD_coclustering.matmul(RB.T, Z, out=buf.RBtZ)
+            RBtRB = RB.T @ RB
+            den = np.matmul(RBtRB, C, out=buf.den_C)
+            C *= RBtZ
+            C /= den
+            RB64, C64 = RB.astype(np.float64, copy=False), C.astype(np.float64, copy=False)
+            cross = np.einsum('ij,ij->', RBtZ, C64, dtype=np.float64)
+            RBC_norm2 = np.einsum('ij,ij->', RBtRB if RB is RB64 else RB64.T @ RB64, C64 @ C64.T)
         else:
             S = R
-            S[:,:] = S[:,:] * (Z@S@B)[:,:] / (S@B@S.T@S@B)[:,:]
-            B[:,:] = B[:,:] * (S.T@Z@S)[:,:] / (S.T@S@B@S.T@S)[:,:]
+            SB = np.matmul(S, B, out=buf.RB)
+            den = np.matmul(SB, S.T @ SB, out=buf.den_R)
+            S *= NBVD_coclustering.matmul(Z, SB, out=buf.num_R)
+            S /= den
+            StS = S.T @ S
+            S64 = S.astype(np.float64, copy=False)
+            if "Z64" in buf:
+                StZS = NBVD_coclustering.matmul(S64.T, buf.Z64, out=buf.RBtZ) @ S64
+            else:
+                StZS = NBVD_coclustering.matmul(S.T, Z, out=buf.RBtZ) @ S
+            den = StS @ B @ StS
+            B *= StZS
+            B /= den
+            B64, StS64 = B.astype(np.float64, copy=False), StS if S is S64 else S64.T @ S64
+            cross = np.einsum('ij,ij->', StZS, B64, dtype=np.float64)
+            RBC_norm2 = np.einsum('ij,ij->', StS64 @ B64, B64 @ StS64)
+        return np.sqrt(max(0, Z_norm2 - 2*cross + RBC_norm2))
 
-    def attempt_coclustering(self, Z,R,B,C, symmetric=False):
-        i, previous_norm, current_norm = 0, np.inf, np.inf
+    def silhouette_sample_size (n_samples):
+        """Number of rows silhouette_distances samples out of n_samples 
+        (None if the full (n_samples, n_samples) distance matrix fits in SILHOUETTE_WORKING_MEMORY)."""
+        if n_samples**2 * np.dtype(np.float64).itemsize <= SILHOUETTE_WORKING_MEMORY * 2**20:
+            return None
+        return min(SILHOUETTE_SAMPLE_SIZE, n_samples)
+
+    def silhouette_distances (X, rng):
+        """Pairwise distances between the rows of X, computed once and reused for the silhouette of 
+        every attempt (so their scores stay comparable). Only a random sample of the rows is used 
+        if there are too many of them (see silhouette_sample_size). Returns (distances, sample indices or None)."""
+        sample = None
+        sample_size = NBVD_coclustering.silhouette_sample_size(X.shape[0])
+        if sample_size is not None:
+            sample = rng.choice(X.shape[0], size=sample_size, replace=False)
+            X = X[sample]
+        return (pairwise_distances(X, metric=SILHOUETTE_METRIC), sample)
 
-        if self.save_norm_history:
-            self.current_norm_history = []
-        if self.save_history:
-            self.current_history = deque()
-            self.current_history.append((R.copy(),B.copy(),C.copy()))
+    def precomputed_silhouette_score (distances, labels):
+        """Silhouette score from the output of silhouette_distances.
+        The per-sample reductions are done in chunks of at most SILHOUETTE_WORKING_MEMORY MiB."""
+        D, sample = distances
+        if sample is not None:
+            labels = labels[sample]
+        with config_context(working_memory=SILHOUETTE_WORKING_MEMORY):
+            return silhouette_score(D, labels, metric="precomputed")
 
-        while i == 0 or (i < self.iter_max and current_norm <= previous_norm):
-            NBVD_coclustering.attempt_coclustering_aux(Z,R,B,C, symmetric=symmetric)
+    def flatten_iteration (R, B, C):
+        """R,B,C flattened (in this order) into a single row of the history array."""
+        return np.concatenate((R.ravel(), B.ravel(), C.ravel()))
 
+    def get_iteration(self, i):
+        """Get (R,B,C) at iteration i of the best attempt (requires save_history)."""
+        n, m = self.data.shape
+        k, l = self.n_row_clusters, self.n_col_clusters
+        R, B, C = np.split(self.best_history[i], [n*k, n*k + k*l])
+        return (R.reshape((n,k)), B.reshape((k,l)), C.reshape((l,m)))
+
+    def attempt_coclustering(self, Z,R,B,C, symmetric=False, iter_max=None, iter_start=0):
+        """Run the updates from R,B,C (in place) until the early stop or iter_max iterations.
+        iter_start is the number of iterations the attempt already did (when continuing one)."""
+        iter_max = iter_max or self.iter_max
+        i, previous_norm, current_norm = 0, np.inf, np.inf
+        # NOTE: norms are accumulated in float64
+        Z_norm2 = np.sum(Z.data.astype(np.float64)**2) if issparse(Z) else np.einsum('ij,ij->', Z, Z, dtype=np.float64)
+        (n, k), (l, m) = R.shape, C.shape
+        # NOTE: sparse float32 data keeps a float64 copy (nnz values) for the norm's cross term
+        Z64 = Z.astype(np.float64) if issparse(Z) and Z.dtype != np.float64 else None
+        buf = NBVD_coclustering.get_buffers(n, m, k, l, dtype=Z.dtype, Z64=Z64)
+
+        # plain locals in the loop (no attribute lookups per iteration)
+        save_history, save_norm_history, tol = self.save_history, self.save_norm_history, self.tol
+        if save_norm_history:
+            norm_history = np.empty(iter_max, dtype=np.float64)
+        if save_history:
+            # one row per iteration holding R,B,C flattened (see get_iteration); stacked at the end
+            history = [NBVD_coclustering.flatten_iteration(R, B, C)]
+
+        stalls = 0
+        while i == 0 or (i < iter_max and stalls < EARLY_STOP_PATIENCE):
             previous_norm = current_norm
-            current_norm = norm(R@B@C - Z)
-            if self.save_norm_history:
-                self.current_norm_history.append(current_norm)
-            if self.save_history:
-                self.current_history.append((R.copy(),B.copy(),C.copy()))
+            current_norm = NBVD_coclustering.attempt_coclustering_aux(Z,R,B,C, symmetric=symmetric, Z_norm2=Z_norm2, buf=buf)
+            if tol == 0:
+                stalls = EARLY_STOP_PATIENCE if current_norm > previous_norm else 0 # baseline rule: stop once the norm goes up
+            elif i == 0 or iter_start + i < EARLY_STOP_MIN_ITER or (previous_norm - current_norm) > tol * previous_norm:
+                stalls = 0
+            else:
+                stalls += 1
+            if save_norm_history:
+                norm_history[i] = current_norm
+            if save_history:
+                history.append(NBVD_coclustering.flatten_iteration(R, B, C))
             i += 1
         
-        return ((R, B, C), current_norm, i)
+        if save_norm_history:
+            self.current_norm_history = norm_history[:i]
+        if save_history:
+            self.current_history = np.vstack(history)
+        # R@B for the final R,B is left in buf by the asymmetric update (C is updated after it)
+        RB = buf.RB if not symmetric else R @ B
+        return ((R, B, C), current_norm, i, RB)
 
-    def do_things(self, Z, symmetric, rng, verbose=False):
+    def nndsvd_init (Z, k, l, symmetric=False, eps=1e-6, random_state=None):
+        """NNDSVD initialization (Boutsidis & Gallopoulos, 2008) of R (n,k), B (k,l) and C (l,m): 
+        R and C are the dominant nonnegative parts of Z's leading singular vectors and B is one 
+        multiplicative update (from all ones) given them (C = R.T if symmetric). Zeros are replaced by eps, 
+        since multiplicative updates can never move an entry away from zero. 
+        random_state seeds the randomized SVD."""
+        n_components = max(k, l)
+        U, s, Vt = randomized_svd(Z, n_components, random_state=random_state)
+        W, H = np.zeros((Z.shape[0], n_components)), np.zeros((n_components, Z.shape[1]))
+        # the leading singular vectors can be chosen nonnegative
+        W[:, 0], H[0, :] = np.sqrt(s[0]) * np.abs(U[:, 0]), np.sqrt(s[0]) * np.abs(Vt[0, :])
+        for j in range(1, n_components):
+            x, y = U[:, j], Vt[j, :]
+            x_p, y_p, x_n, y_n = np.maximum(x, 0), np.maximum(y, 0), np.maximum(-x, 0), np.maximum(-y, 0)
+            x_p_norm, y_p_norm, x_n_norm, y_n_norm = norm(x_p), norm(y_p), norm(x_n), norm(y_n)
+            # keep whichever (positive or negative) part carries more of the singular pair (eps guards zero norms)
+            if x_p_norm * y_p_norm >= x_n_norm * y_n_norm:
+                u, v, sigma = x_p / max(x_p_norm, eps), y_p / max(y_p_norm, eps), x_p_norm * y_p_norm
+            else:
+                u, v, sigma = x_n / max(x_n_norm, eps), y_n / max(y_n_norm, eps), x_n_norm * y_n_norm
+            lbd = np.sqrt(s[j] * sigma)
+            W[:, j], H[j, :] = lbd * u, lbd * v
+        R, C = np.maximum(W[:, :k], eps), np.maximum(H[:l, :], eps)
+        if symmetric:
+            C = R.T
+        B = np.ones((k, l))
+        B = np.maximum(B * (R.T @ Z @ C.T) / ((R.T @ R) @ B @ (C @ C.T)), eps) # one update of B from ones
+        R, B = R.astype(Z.dtype), B.astype(Z.dtype)
+        return (R, B, R.T if symmetric else C.astype(Z.dtype))
+
+    def init_factors(self, Z, symmetric, seed, init="random", z_mean=None):
+        """Initial (R,B,C) for an attempt: "random" (seeded by seed) or "nndsvd".
+        z_mean is Z.mean(), if already known."""
+        rng = default_rng(seed)
         n, m = Z.shape
         k, l = self.n_row_clusters, self.n_col_clusters
-        attempt_no, best_norm, best_results, best_iter, best_sil = 0, np.inf, None, 0, MeanTuple(-np.inf)
+        z_mean = Z.mean() if z_mean is None else z_mean
+        if init == "nndsvd":
+            R, B, C = NBVD_coclustering.nndsvd_init(Z, k, l, symmetric=symmetric, random_state=seed)
+        elif init != "random":
+            raise Exception(f"[NBVD.init_factors] invalid init: {init}")
+        elif not symmetric:
+            # initialize R,B,C with uniform(0,1), mean*ones, uniform(0,1)
+            R, B, C = rng.random((n,k), dtype=Z.dtype), np.full((k,l), z_mean, dtype=Z.dtype), rng.random((l,m), dtype=Z.dtype)
+        else:
+            R, B = rng.random((n,k), dtype=Z.dtype), np.full((k,l), z_mean, dtype=Z.dtype)
+            C = R.T
+        return (R, B, C)
 
-        while attempt_no < self.n_attempts:
-            if not symmetric:
-                # initialize R,B,C with uniform(0,1), mean*ones, uniform(0,1)
-                R, B, C = rng.random((n,k)), Z.mean() * np.ones((k,l)), rng.random((l,m))
-            else:
-                R, B = rng.random((n,k)), Z.mean() * np.ones((k,l))
-                C = R.T
-            s = cool_header_thing()
+    def run_attempt(self, Z, symmetric, R, B, C, iter_max, iter_start=0):
+        """Run (or continue, after iter_start iterations) a single attempt from R,B,C for at most iter_max iterations.
+        Self-contained so attempts can run in separate processes; the histories are returned 
+        (None if not saved) instead of being read back from self."""
+        if symmetric:
+            C = R.T # the view is lost if R,B,C went through another process
+        results, current_norm, iter_stop, RB = self.attempt_coclustering(Z,R,B,C, symmetric=symmetric, iter_max=iter_max, iter_start=iter_start)
+        history = self.current_history if self.save_history else None
+        norm_history = self.current_norm_history if self.save_norm_history else None
+        return (results, current_norm, iter_stop, RB, history, norm_history)
+
+    def join_attempts(first, second):
+        """Join an attempt (as returned by run_attempt) with its continuation."""
+        _, _, first_iter, _, history, norm_history = first
+        results, current_norm, second_iter, RB, second_history, second_norm_history = second
+        if history is not None:
+            history = np.vstack([history, second_history[1:]]) # first row of the continuation is the last of the first
+        if norm_history is not None:
+            norm_history = np.concatenate([norm_history, second_norm_history])
+        return (results, current_norm, first_iter + second_iter, RB, history, norm_history)
+
+    def do_things(self, Z, symmetric, rng, verbose=False):
+        best_norm, best_results, best_iter, best_sil, best_RB, best_labels = np.inf, None, 0, MeanTuple(-np.inf), None, None
+
+        # attempts are independent, so run them in parallel (one seed each) and compare afterwards
+        seeds = rng.integers(2**31, size=self.n_attempts)
+        inits = [self.init] + ["random"] * (self.n_attempts - 1) # nndsvd is deterministic, so only once
+        z_mean = Z.mean()
+        factors = [self.init_factors(Z, symmetric, seed, init, z_mean=z_mean) for seed, init in zip(seeds, inits)]
+        parallel = Parallel(n_jobs=self.n_jobs if self.n_attempts > 1 else 1)
+
+        if self.n_attempts > WARMUP_KEEP and self.iter_max > WARMUP_ITER:
+            # (Multi-Start 2) run every attempt for a few iterations and only continue the ones with the lowest norm
+            warmups = parallel(delayed(self.run_attempt)(Z, symmetric, *f, WARMUP_ITER) for f in factors)
+            attempt_nos = sorted(sorted(range(self.n_attempts), key=lambda a: warmups[a][1])[:WARMUP_KEEP])
             if verbose:
-                self.print_or_log(f"\n{s}\nAttempt #{attempt_no+1}:\n{s}\n")
-            
-            results, current_norm, iter_stop = self.attempt_coclustering(Z,R,B,C, symmetric=symmetric)
+                for a, warmup in enumerate(warmups):
+                    status = "continued" if a in attempt_nos else "discarded"
+                    self.print_or_log(f"  Attempt #{a+1} warmup norm: {warmup[1]} ({status})")
+            # attempts that already stopped during the warmup don't need continuing
+            to_continue = [a for a in attempt_nos if warmups[a][2] == WARMUP_ITER]
+            continued = dict(zip(to_continue, parallel(
+                delayed(self.run_attempt)(Z, symmetric, *warmups[a][0], self.iter_max - WARMUP_ITER, WARMUP_ITER) for a in to_continue)))
+            attempts = [NBVD_coclustering.join_attempts(warmups[a], continued[a]) if a in continued else warmups[a] 
+                        for a in attempt_nos]
+        else:
+            attempt_nos = range(self.n_attempts)
+            attempts = parallel(delayed(self.run_attempt)(Z, symmetric, *f, self.iter_max) for f in factors)
+        lowest_norm = min(current_norm for _, current_norm, *_ in attempts)
+        row_distances, col_distances = None, None # Z doesn't change, so these are only computed (once) if needed
 
+        for attempt_no, (results, current_norm, iter_stop, RB, history, norm_history) in zip(attempt_nos, attempts):
+            s = cool_header_thing()
             if verbose:
+                self.print_or_log(f"\n{s}\nAttempt #{attempt_no+1}:\n{s}\n")
                 if iter_stop < self.iter_max:
                     self.print_or_log(f"  early stop after {iter_stop} iterations")
                 self.print_or_log(f"  Attempt #{attempt_no+1} norm: {current_norm}")
 
             R,B,C = results
-            _, row_labels, col_labels = NBVD_coclustering.get_labels_bicluster(R, C, B=B, Z=Z, method=DEFAULT_NBVD_LABELING_METHOD)
-            sil_row = silhouette_score(Z, row_labels, metric=SILHOUETTE_METRIC)
-            sil_col = silhouette_score(Z.T, col_labels, metric=SILHOUETTE_METRIC)
-            silhouette = MeanTuple(sil_row, sil_col)
-            if verbose:
-                self.print_or_log(f"  Attempt #{attempt_no+1} silhouette:\n\trows: {sil_row:.3f}\n\tcols: {sil_col:.3f}")
+            if current_norm > SILHOUETTE_NORM_MARGIN * lowest_norm:
+                # clearly worse than another attempt; don't bother with the silhouette
+                silhouette, labels = MeanTuple(-np.inf), None
+                if verbose:
+                    self.print_or_log(f"  Attempt #{attempt_no+1} skipped silhouette (norm too far from {lowest_norm})")
+            else:
+                labels = NBVD_coclustering.get_labels_bicluster(R, C, B=B, Z=Z, method=DEFAULT_NBVD_LABELING_METHOD)
+                _, row_labels, col_labels = labels
+                if row_distances is None:
+                    row_distances = NBVD_coclustering.silhouette_distances(Z, rng)
+                    col_distances = NBVD_coclustering.silhouette_distances(Z.T, rng)
+                sil_row = NBVD_coclustering.precomputed_silhouette_score(row_distances, row_labels)
+                sil_col = NBVD_coclustering.precomputed_silhouette_score(col_distances, col_labels)
+                silhouette = MeanTuple(sil_row, sil_col)
+                if verbose:
+                    self.print_or_log(f"  Attempt #{attempt_no+1} silhouette:\n\trows: {sil_row:.3f}\n\tcols: {sil_col:.3f}")
 
             if silhouette > best_sil:
                 if verbose:
                     self.print_or_log("__is__ best!")
                 if self.save_history:
-                    self.best_history = self.current_history
+                    self.best_history = history
                 if self.save_norm_history:
-                    self.norm_history = self.current_norm_history
-                best_results, best_norm, best_iter, best_sil = results, current_norm, iter_stop, silhouette
-            attempt_no += 1
+                    self.norm_history = norm_history
+                best_results, best_norm, best_iter, best_sil, best_RB, best_labels = results, current_norm, iter_stop, silhouette, RB, labels
         
         # set attributes so we have more info
-        self.best_norm, self.best_iter = best_norm, best_iter
+        # (the labels and silhouette of the best attempt are kept so they aren't computed again after fitting)
+        self.best_norm, self.best_iter, self.RB, self.best_labels = best_norm, best_iter, best_RB, best_labels
+        self.best_silhouette = best_sil
         return best_results
         
     # runs after auto-generated init
     def __post_init__(self):
         # initialization
         rng = default_rng(seed=self.random_state)
-        self.data = np.array(self.data)
+        # NOTE: contiguous float data (CSR if sparse) so every product goes straight to BLAS / sparse matmul
+        if issparse(self.data):
+            self.data = csr_matrix(self.data, dtype=self.dtype)
+        else:
+            self.data = np.ascontiguousarray(self.data, dtype=self.dtype)
         Z = self.data
-        self.Z = self.data # in case we prefer to call it this way
         
         # clustering # /DEL
         if self.symmetric: # /DEL
@@ -232,10 +461,12 @@ class NBVD_coclustering:
         if self.symmetric: # /DEL
             self.S = self.R
 
-        self.basis_vectors = NBVD_coclustering.get_basis_vectors(self.R, self.B, self.C)
-        self.biclusters_, self.row_labels_, self.column_labels_ = NBVD_coclustering.get_labels_bicluster(
+        self.basis_vectors = NBVD_coclustering.get_basis_vectors(self.R, self.B, self.C, RB=self.RB)
+        if self.best_labels is None:
+            self.best_labels = NBVD_coclustering.get_labels_bicluster(
                             self.R, self.C, self.B, self.data, 
                             method=DEFAULT_NBVD_LABELING_METHOD)
+        self.biclusters_, self.row_labels_, self.column_labels_ = self.best_labels
         self.cluster_assoc = NBVD_coclustering.get_cluster_assoc(self.R, self.B, self.C)
         self.centroids = NBVD_coclustering.get_centroids(
                         self.data, 
@@ -7,8 +7,7 @@ import math
 from matplotlib import pyplot as plt
 import matplotlib.lines as mlines
 import pandas as pd
-from gensim.models import Word2Vec, KeyedVectors, Doc2Vec
-from gensim.models.doc2vec import TaggedDocument
+import sklearn
 from sklearn.datasets import make_biclusters
 from sklearn.cluster import KMeans, SpectralClustering
 from sklearn.metrics import silhouette_score, consensus_score, accuracy_score, adjusted_rand_score, v_measure_score, adjusted_mutual_info_score
@@ -21,8 +20,9 @@ import nltk
 import colored
 from typing import Literal, Iterable # Python 3.8+
 from collections import Counter, OrderedDict # OrderedDict is redundant as of Python 3.7
-import sys,os,pickle,re
+import sys,os,pickle,re,inspect
 from itertools import combinations
+from joblib import Parallel, delayed, Memory
 
 from nbvd import NBVD_coclustering
 from my_utils import *
@@ -60,7 +60,8 @@ N_ATTEMPTS=1 # DBG
 W2V_DIM=100
 ALG='nbvd'
 WAIT_TIME = 4 # wait time between tasks
-rerun_embedding=True
+rerun_embedding=False # redo (and overwrite) the cached preprocessing/vectorization; stale entries are already missed (see embedding_cache_key)
+EMBEDDING_CACHE_FOLDER = ".embedding_cache"
 LABELING_METHOD="centroids method"
 CLUSTER_CENTER_IS_AVERAGE=False
 DEFAULT_CLUSTER_CENTER_METHOD = "cluster_avgs" if CLUSTER_CENTER_IS_AVERAGE else "prototype_centers"
@@ -73,6 +74,8 @@ NORM_PLOT = False # (NBVD) display norm plot
 MOVIE=False
 ASPECT_RATIO=4 # 1/6 for w2v; 10 for full tfidf; 4 for partial
 SHOW_IMAGES=True
+if not SHOW_IMAGES:
+    plt.switch_backend("Agg") # no GUI event loop when figures are only saved
 NEW_ABS=True
 LOG_BASE_FOLDER = "classification_info"
 
@@ -85,27 +88,28 @@ REP_METHOD_FOR_ORIG_ABS="matrix_assoc_fancy"
 
 class FooClass:
     pass
-exp_numbers = re.compile("[^A-Za-z]\d+\.\d+|[^A-Za-z]\d+\,\d+|[^A-Za-z]\d+")
-exp_non_alpha = re.compile("[^A-Za-zÀàÁáÂâÃãÉéÊêÍíÓóÔôÕõÚúÇç02-9 \._–+]+")
-exp_whitespace = re.compile("\s+")
-exp_hyphen = re.compile("(?<=[a-z])\-(?=[a-z])")
+# NOTE: patterns start with what they actually replace (cheaper for the regex engine)
+exp_numbers = re.compile(r"[^A-Za-z]\d+(?:[.,]\d+)?")
+exp_non_alpha = re.compile(r"[^A-Za-zÀàÁáÂâÃãÉéÊêÍíÓóÔôÕõÚúÇç02-9 \._–+]+")
+exp_whitespace = re.compile(r"\s\s+|[^\S ]")
+exp_hyphen = re.compile(r"-(?<=[a-z]-)(?=[a-z])")
 
 # NOTES: no overly small abstracts (all greater than 300 characters); 
 # but there are some duplicates
 class Preprocessor:
+    def __init__(self, n_jobs=None):
+        self.n_jobs = n_jobs # abstracts are independent, so they can be preprocessed in parallel
+
     def lower_but_keep_acronyms (s):
-        new = []
-        for w in s.split(" "):
-            new.append(w if w.isupper() and len(w) >= 2 else w.lower())
-        return " ".join(new)
+        return " ".join([w if w.isupper() and len(w) >= 2 else w.lower() for w in s.split(" ")])
 
     def preprocess (self, sentence):
-        new_sentence = sentence
-        new_sentence = Preprocessor.lower_but_keep_acronyms(new_sentence)
-        new_sentence = re.sub(exp_hyphen, "_", new_sentence) # keep compound words in tokenization
-        new_sentence = re.sub(exp_numbers, " 1", new_sentence)
-        new_sentence = re.sub(exp_non_alpha, "", new_sentence)
-        new_sentence = re.sub(exp_whitespace, " ", new_sentence)
+        # NOTE: the substitutions are order-dependent, so they stay separate passes
+        new_sentence = Preprocessor.lower_but_keep_acronyms(sentence)
+        new_sentence = exp_hyphen.sub("_", new_sentence) # keep compound words in tokenization
+        new_sentence = exp_numbers.sub(" 1", new_sentence)
+        new_sentence = exp_non_alpha.sub("", new_sentence)
+        new_sentence = exp_whitespace.sub(" ", new_sentence)
         return new_sentence
 
     def fit(self, X, y=None, **fit_params):
@@ -113,37 +117,18 @@ class Preprocessor:
 
     def transform(self, X, y=None, **fit_params):
         X_list = X.to_list() if type(X) != list else X
-        unique_sentences = set()
-        newX = []
-        for i,sentence in enumerate(X_list):
-            if len(sentence) > 300 and sentence not in unique_sentences:
-                unique_sentences.add(sentence)
-                newX.append(self.preprocess(sentence))
-        return newX
-
-def __candidate_selection (dists_to_centroid, labels, cluster_no, n_representatives):
-    count = 0
-    for i, _ in dists_to_centroid:
-        if labels[i] == cluster_no:
-            count += 1
-            yield i
-        if count >= n_representatives:
-            return # stop yielding
-
-def get_representatives (data, model, n_clusters, n_representatives=5, reverse=False, 
-        method='centroid_dif', metric='cosine', kind=None, 
-        cluster_center_method=DEFAULT_CLUSTER_CENTER_METHOD) -> dict:
-    cluster_representatives = {}
-
-    # get relevant properties
-    if kind == 'docs':
-        labels = model.row_labels_
-    elif kind == 'words':
-        labels = model.column_labels_
-    else:
-        raise Exception("get_representatives: must specify 'kind'")
-    original_data = model.__original_data if hasattr(model, "__original_data") else None
-    vec = model.__vectorization if hasattr(model, "__vectorization") else None
+        # drop duplicates (keeping the first occurrence) and overly small abstracts
+        unique_sentences = [sentence for sentence in dict.fromkeys(X_list) if len(sentence) > 300]
+        # NOTE: n_jobs=None (the default) runs sequentially; workers only pay off for much larger corpora
+        return Parallel(n_jobs=self.n_jobs, batch_size="auto")(
+            delayed(self.preprocess)(sentence) for sentence in unique_sentences)
+
+def get_representative_distances (data, model, method='centroid_dif', metric='cosine', kind=None, 
+        cluster_center_method=DEFAULT_CLUSTER_CENTER_METHOD):
+    """Distance (or, for the matrix_assoc methods, association) of each document/word to each cluster,
+    as used by get_representatives. Returns an (n_elements, n_clusters) array."""
+    if kind not in ('docs', 'words'):
+        raise Exception("get_representative_distances: must specify 'kind'")
 
     if hasattr(model, "B"):
         R,B,C = model.R, model.B, model.C
@@ -169,13 +154,12 @@ def get_representatives (data, model, n_clusters, n_representatives=5, reverse=F
 
         # calculate distances to centroids
         # NOTE: words are not normalized (but documents are)
-        all_distances = np.zeros((data.shape[0], n_clusters))
-        n_data = normalize(data) if kind == 'words' else data # TODO: comment out if
+        # (cosine distances normalize the rows themselves, so no normalized copy of sparse data is made for them)
+        n_data = normalize(data) if (kind == 'words' and metric != 'cosine') else data # TODO: comment out if
         # TODO: test linear_kernel
         all_distances = pairwise_distances(n_data, normalized_centroids, metric=metric)
         print(f"all_distances shape: {all_distances.shape =}") # DBG
     elif method == 'matrix_assoc' or method == 'matrix_assoc_fancy':
-        reverse = not reverse # small distance == big assoc
         adh_method = "fancy" if ("fancy" in method) else "rbc"
         row_adh, col_adh = NBVD_coclustering.get_adherence(R, C, B, method=adh_method)
         if kind == 'docs':
@@ -184,26 +168,52 @@ def get_representatives (data, model, n_clusters, n_representatives=5, reverse=F
             all_distances = col_adh
     else:
         raise Exception(f"[get_representatives] invalid method: {method}")
+    return all_distances
+
+def get_representatives (data, model, n_clusters, n_representatives=5, reverse=False, 
+        method='centroid_dif', metric='cosine', kind=None, 
+        cluster_center_method=DEFAULT_CLUSTER_CENTER_METHOD, all_distances=None) -> dict:
+    """If all_distances (from get_representative_distances, with the same arguments) is given, 
+    it is reused instead of being calculated again."""
+    cluster_representatives = {}
+
+    # get relevant properties
+    if kind == 'docs':
+        labels = model.row_labels_
+    elif kind == 'words':
+        labels = model.column_labels_
+    else:
+        raise Exception("get_representatives: must specify 'kind'")
+
+    if method == 'matrix_assoc' or method == 'matrix_assoc_fancy':
+        reverse = not reverse # small distance == big assoc
+    if all_distances is None:
+        all_distances = get_representative_distances(data, model, method=method, metric=metric, kind=kind, 
+                                                     cluster_center_method=cluster_center_method)
 
     # get representatives
+    labels = np.asarray(labels)
     for c in range(n_clusters):
-        dists_to_centroid = sorted(
-            zip(range(data.shape[0]), list(all_distances[:,c])), 
-            key = lambda t : t[1], reverse=reverse
-        )
-        # select top n; eliminate candidates that arent from the relevant cluster
-        rep_candidates = list(__candidate_selection(dists_to_centroid, labels, c, n_representatives))
+        # only candidates from the relevant cluster are ranked; select top n
+        members = np.flatnonzero(labels == c)
+        dists_to_centroid = all_distances[members, c]
+        keys = -dists_to_centroid if reverse else dists_to_centroid
+        if 0 < n_representatives < len(keys):
+            # only the (up to) n smallest keys are sorted (ties with the n-th are kept)
+            kth = np.partition(keys, n_representatives - 1)[n_representatives - 1]
+            members, keys = members[keys <= kth], keys[keys <= kth]
+        # NOTE: stable sort so ties keep their original order
+        order = np.argsort(keys, kind="stable")
+        rep_candidates = members[order[:n_representatives]].tolist()
         if rep_candidates: # if anyones left
             cluster_representatives[c] = rep_candidates   
     
     return cluster_representatives
 
-def calculate_occurrence (word, original_data, indices):
-    count = 0
-    for i in indices:
-        if word.lower() in original_data[i].lower():
-            count += 1
-    return count
+def calculate_occurrence (word, lowered_data, indices):
+    """Number of documents (among indices) that contain word. Documents must already be lowercase."""
+    word = word.lower()
+    return sum(word in lowered_data[i] for i in indices)
 
 def cluster_summary (data, model, n_doc_reps=5, n_word_reps=20, n_frequent=40,
             word_reps=None, verbose=True, logger=None, rep_method="centroid_dif"):
@@ -248,9 +258,11 @@ def cluster_summary (data, model, n_doc_reps=5, n_word_reps=20, n_frequent=40,
                     relevant_coclusters.append((i,j))
     
     # get row- and column-cluster representatives
+    # NOTE: document distances are calculated once and reused for the top/bottom N documents below
+    doc_distances = get_representative_distances(data, model, method=rep_method, kind='docs')
     row_cluster_representatives = get_representatives(data, model, k, 
                                 n_representatives=n_doc_reps, kind='docs',
-                                method=rep_method
+                                method=rep_method, all_distances=doc_distances
                                 )
     if word_reps is None: # calculate word representatives if they are not given
         col_cluster_representatives = get_representatives(data.T, model, l, 
@@ -292,9 +304,12 @@ def cluster_summary (data, model, n_doc_reps=5, n_word_reps=20, n_frequent=40,
             # TODO: account for clusters smaller than N; duct tape solution is to reduce N manually
             print_or_log(f"word (occurrence in top {N} documents)(occurrence in bottom {N} documents) (occurrence in other doc clusters)")
             row_reps_topN = get_representatives(data, model, 
-                k, n_representatives=N, kind='docs', method=rep_method)
+                k, n_representatives=N, kind='docs', method=rep_method, all_distances=doc_distances)
             row_reps_bottomN = get_representatives(data, model, 
-                k, n_representatives=N, reverse=True, kind='docs', method=rep_method)
+                k, n_representatives=N, reverse=True, kind='docs', method=rep_method, all_distances=doc_distances)
+            # NOTE: only the top/bottom representatives are lowercased, once
+            lowered_data = {i: original_data[i].lower() 
+                            for reps in (*row_reps_topN.values(), *row_reps_bottomN.values()) for i in reps}
             
             # for each cocluster
             w_occurrence_per_d_cluster = OrderedDict() # store occurrence and dc info for each word
@@ -321,8 +336,8 @@ def cluster_summary (data, model, n_doc_reps=5, n_word_reps=20, n_frequent=40,
                         if size_topN < N or size_botN < N: # DBG
                             print(f"###########\n[cluster_summary] Warning: doc cluster {dc} only has {size_topN} reps; expected {N}\n###########")
                         
-                        oc_top = 100/size_topN * calculate_occurrence(word, original_data, row_reps_topN[dc])
-                        oc_bottom = 100/size_botN * calculate_occurrence(word, original_data, row_reps_bottomN[dc])
+                        oc_top = 100/size_topN * calculate_occurrence(word, lowered_data, row_reps_topN[dc])
+                        oc_bottom = 100/size_botN * calculate_occurrence(word, lowered_data, row_reps_bottomN[dc])
                         
                         w_occurrence_per_d_cluster[word] = OrderedDict()
                         w_occurrence_per_d_cluster[word][dc] = Bunch(occ=(oc_top, oc_bottom), assigned_dc=dc, assigned_wc=wc)
@@ -336,7 +351,7 @@ def cluster_summary (data, model, n_doc_reps=5, n_word_reps=20, n_frequent=40,
                             if size_top_other < N: # DBG
                                 print(f"###########\n[cluster_summary] Warning: doc cluster {rclust} only has {size_top_other} reps; expected {N}\n###########")
 
-                            oc_other = 100/size_top_other * calculate_occurrence(word, original_data, row_reps_topN[rclust])
+                            oc_other = 100/size_top_other * calculate_occurrence(word, lowered_data, row_reps_topN[rclust])
                             oc_others.append((rclust, oc_other))
                             w_occurrence_per_d_cluster[word][rclust] = Bunch(occ=(oc_other, ), assigned_dc=dc, assigned_wc=wc)
 
@@ -406,16 +421,15 @@ def cocluster_words_bar_plot (w_occurrence_per_d_cluster, filename_suffix=""):
     plt.show()
 
 def do_vectorization (new_abstracts, vectorization_type, **kwargs):
+    # NOTE: the document-term matrix is kept as (float32) CSR; it is only densified for plots
     if vectorization_type == 'tfidf':
-        vec = TfidfVectorizer(**kwargs)
-        data = vec.fit_transform(new_abstracts).toarray()
+        vec = TfidfVectorizer(dtype=np.float32, **kwargs)
     elif vectorization_type == 'count':
-        vec = CountVectorizer(**kwargs)
-        data = vec.fit_transform(new_abstracts).toarray()
+        vec = CountVectorizer(dtype=np.float32, **kwargs)
     elif vectorization_type == 'tfidf-char':
         #vec = TfidfVectorizer(ngram_range=(5,5), analyzer='char', max_features=15000)
-        vec = TfidfVectorizer(ngram_range=(5,5), analyzer='char')
-        data = vec.fit_transform(new_abstracts).toarray()
+        vec = TfidfVectorizer(ngram_range=(5,5), analyzer='char', dtype=np.float32)
+    data = vec.fit_transform(new_abstracts)
     return (data, vec)
 
 def do_task_single (data, original_data, vectorization, only_one=True, alg=ALG, 
@@ -441,7 +455,7 @@ def do_task_single (data, original_data, vectorization, only_one=True, alg=ALG,
 
     # show animation of clustering process
     if MOVIE and alg == 'nbvd':
-        pyqtgraph_thing(data, model, 25)
+        pyqtgraph_thing(densify(data), model, 25)
 
     #########################
     # evaluate results 
@@ -449,15 +463,20 @@ def do_task_single (data, original_data, vectorization, only_one=True, alg=ALG,
 
     ### internal indices
     # print silhouette scores
-    silhouette = print_silhouette_score(data, model.row_labels_, model.column_labels_, logger=logger)
+    # NOTE: reuse the silhouette NBVD chose its best attempt by, unless it was estimated on a sample
+    known_silhouette = getattr(model, "best_silhouette", MeanTuple(-np.inf)).numbers
+    exact = len(known_silhouette) == 2 and all(NBVD_coclustering.silhouette_sample_size(d) is None for d in data.shape)
+    silhouette = print_silhouette_score(data, model.row_labels_, model.column_labels_, logger=logger, 
+                                        scores=known_silhouette if exact else None)
 
     if show_images:
         # shade lines/columns of original dataset
         if LABEL_CHECK:
-            shaded_label_matrix(data, model.row_labels_, kind="rows", method_name=LABELING_METHOD, RNG=RNG, opacity=1, aspect_ratio=ASPECT_RATIO)
-            shaded_label_matrix(data, model.column_labels_, kind="columns", method_name=LABELING_METHOD, RNG=RNG, opacity=1, aspect_ratio=ASPECT_RATIO)
+            dense_data = densify(data)
+            shaded_label_matrix(dense_data, model.row_labels_, kind="rows", method_name=LABELING_METHOD, RNG=RNG, opacity=1, aspect_ratio=ASPECT_RATIO)
+            shaded_label_matrix(dense_data, model.column_labels_, kind="columns", method_name=LABELING_METHOD, RNG=RNG, opacity=1, aspect_ratio=ASPECT_RATIO)
             if SHADE_COCLUSTERS and alg == "nbvd":
-                shade_coclusters(data, (model.row_labels_, model.column_labels_), 
+                shade_coclusters(dense_data, (model.row_labels_, model.column_labels_), 
                     model.cluster_assoc, RNG=RNG, aspect_ratio=ASPECT_RATIO)
         
         # centroid (and dataset) (normalized) scatter plot
@@ -487,9 +506,6 @@ def do_task_single (data, original_data, vectorization, only_one=True, alg=ALG,
             plot_norm_history(model)
 
         # general plots #/DEL
-        if alg == 'nbvd':
-            to_plot = [data, model.R@model.B@model.C]
-            names = ["Original dataset", "Reconstructed matrix RBC"]
         # TODO: make this nicer maybe keep the timer logic
         #plot_matrices(to_plot, names, timer = None if only_one else 2*timer, aspect_ratio=ASPECT_RATIO)
         plt.show()
@@ -511,10 +527,10 @@ def do_task_single (data, original_data, vectorization, only_one=True, alg=ALG,
 
 def load_new_new_abstracts (path, n_abstracts, old_abstracts):
     old_abstracts_S = set(old_abstracts)
-    df = pd.read_csv(path, delimiter=',')
-    new_new_abstracts = df['abstract'][:n_abstracts].to_list()
+    df = pd.read_csv(path, delimiter=',', usecols=['abstract'], nrows=n_abstracts) # the other columns (and rows) are never used
+    new_new_abstracts = df['abstract'].to_list()
     new_new_not_repeat = [ab for ab in new_new_abstracts if ab not in old_abstracts_S]
-    new_processed_abstracts = Preprocessor().transform(new_new_not_repeat) # preprocess and eliminate duplicates
+    new_processed_abstracts = cached_preprocessing(new_new_not_repeat, cache_key=embedding_cache_key()) # preprocess and eliminate duplicates
     print(f"\nnew abstracts: {len(new_processed_abstracts)} | old abstracts present: {len(new_new_abstracts) - len(new_new_not_repeat)}")
     return new_processed_abstracts, df
 
@@ -528,7 +544,8 @@ def vec_and_class_new_abstracts (extra_abstracts : Iterable, vec, model, logger=
     n, l = col_centers.shape
 
     # vectorize abstracts
-    Z = vec.transform(extra_abstracts).toarray()
+    # NOTE: same dtype as the model's centers, so the distances below don't upcast them (kept sparse)
+    Z = vec.transform(extra_abstracts).astype(model.dtype)
     n, _ = Z.shape
 
     # classify rows and columns
@@ -539,7 +556,7 @@ def vec_and_class_new_abstracts (extra_abstracts : Iterable, vec, model, logger=
 def new_abs_reduced_centroids_plot (Z, new_labels, orig_model, RNG=None):
     RNG = RNG or np.default_rng()
     # plot new samples and old cluster averages
-    old_row_centroids = get_centroids_by_cluster(orig_model.data, orig_model.row_labels_, n_clusters=orig_model.centroids[0].shape[1])
+    old_row_centroids = orig_model.centroids[0] # the cluster averages of the original data
     _, _, ax = centroid_scatter_plot(
         Z, old_row_centroids, new_labels, 
         title="New samples and Row centroids", pca=orig_model.row_pca,
@@ -581,7 +598,7 @@ def new_abs_cluster_summary_bar_plot (data, new_abstracts, row_col_labels, row_c
         model.basis_vectors = orig_model.basis_vectors
     
     if hasattr(orig_model,"row_pca"):
-        model.col_pca = PCA(n_components=2, random_state=42).fit(normalize(np.vstack([data.T, row_col_centroids[1].T])))
+        model.col_pca = PCA(n_components=2, random_state=42).fit(normalize(np.vstack([densify(data.T), row_col_centroids[1].T])))
         model.row_pca, model.row_c_palette, model.col_c_palette = orig_model.row_pca, orig_model.row_c_palette, orig_model.col_c_palette
 
     _, w_occurrence_per_d_cluster = cluster_summary(data, model, 
@@ -615,19 +632,16 @@ def highlight_passages (new_abstracts, new_abs_classification, row_centroids, or
     print("zero segms", np.sum(np.sum(segm_matrix,axis=1) == 0))
 
     # calculate distances to centroids and select segments with distance smaller than threshold
+    # NOTE: all non-empty segments at once; empty ones get a distance bigger than any real one
     segm_count = 0
-    all_distances = np.zeros((segm_matrix.shape[0], k), dtype=np.float64)
     big_thing = m
+    all_distances = np.full((segm_matrix.shape[0], k), big_thing, dtype=np.result_type(segm_matrix.dtype, row_centroids.dtype)) # float32 for float32 data
+    non_empty = np.asarray(segm_matrix.sum(axis=1)).ravel() != 0
+    if non_empty.any(): # euclidean_distances rejects 0 samples
+        all_distances[non_empty] = euclidean_distances(segm_matrix[non_empty], row_centroids.T)
     for i, ab in enumerate(new_abstracts):
         label = new_abs_classification[i]
         N_select = math.ceil(0.2*abs_sizes[i])
-        abs_matrix = segm_matrix[segm_count:segm_count+abs_sizes[i]]
-
-        for j,r in enumerate(abs_matrix):
-            if not (np.sum(r) == 0):
-                all_distances[segm_count+j] = [norm(r-centroid) for centroid in row_centroids.T]
-            else:
-                all_distances[segm_count+j] = big_thing
         abs_distances = all_distances[segm_count:segm_count+abs_sizes[i], :]
 
         selected = [segm_idx for dist,segm_idx in sorted(zip(abs_distances[:, label],range(abs_distances.shape[0])))[:N_select]]
@@ -658,32 +672,54 @@ def misc_statistics (orig_model, new_new_abstracts, new_data, row_col_labels): #
     print(f"\nnorm for original centroids (r,c): {norm(orig_model.centroids[0])}, {norm(orig_model.centroids[1])}")
     print(f"mean for original centroids (r,c): {np.mean(orig_model.centroids[0])}, {np.mean(orig_model.centroids[1])}")
 
-    orig_r_clust_avg = get_centroids_by_cluster(orig_model.data, orig_model.row_labels_, orig_model.n_row_clusters)
+    orig_r_clust_avg = orig_model.centroids[0] # NOTE: already get_centroids_by_cluster(data, row_labels_) (see NBVD_coclustering.get_centroids)
     new_r_clust_avg = get_centroids_by_cluster(new_data, row_col_labels[0], orig_model.n_row_clusters)
     row_dist = norm(orig_r_clust_avg - new_r_clust_avg, axis=0)
     print(f"Difference between original and new cluster averages:\n\t{row_dist}")
 
     s1 = set(orig_model.__vectorization.vocabulary_.keys())
-    new_vec = TfidfVectorizer(**vec_kwargs)
+    # only the vocabulary is needed, so idf weights aren't computed
+    new_vec = CountVectorizer(**vec_kwargs)
     new_vec.fit(new_new_abstracts)
     s2 = set(new_vec.vocabulary_.keys())
     print("\n\nvocab1:", len(s1),"vocab2:", len(s2))
     print("vocab difference (2 not in 1):",len(s2.difference(s1)))
     print("tfidf words missing in all new abstracts:", np.sum(np.sum(new_data,axis=0)==0) )
 
+def embedding_cache_key ():
+    """What the cached preprocessing/vectorization depends on besides its arguments: the code of 
+    Preprocessor and do_vectorization, the regexes and sklearn's version (the vectorizer is pickled)."""
+    regexes = [exp.pattern for exp in (exp_numbers, exp_non_alpha, exp_whitespace, exp_hyphen)]
+    return (inspect.getsource(Preprocessor), inspect.getsource(do_vectorization), regexes, sklearn.__version__)
+
+def preprocess_abstracts (abstracts, cache_key=None):
+    # NOTE: cache_key is unused; it's only there to be part of the cached call's arguments
+    return Preprocessor().transform(abstracts)
+
+def preprocess_and_vectorize (abstracts, vectorization_type, cache_key=None, **kwargs):
+    new_abstracts = preprocess_abstracts(abstracts)
+    data, vec = do_vectorization(new_abstracts, vectorization_type, **kwargs)
+    return (new_abstracts, data, vec)
+
+# NOTE: joblib doesn't hash the code the cached functions call, hence cache_key=embedding_cache_key()
+embedding_memory = Memory(EMBEDDING_CACHE_FOLDER, verbose=0)
+cached_vectorization = embedding_memory.cache(preprocess_and_vectorize)
+cached_preprocessing = embedding_memory.cache(preprocess_abstracts) # new abstracts (only preprocessed)
+
 def main():
     global RNG_SEED
     RNG, RNG_SEED = start_default_rng(seed=RNG_SEED)
     np.set_printoptions(edgeitems=5, threshold=sys.maxsize,linewidth=95) # very personal preferences :)
 
     # read and process
-    df = pd.read_csv('data/artigosUtilizados.csv', delimiter=',')
+    df = pd.read_csv('data/artigosUtilizados.csv', delimiter=',', usecols=['abstract'])
     abstracts = df['abstract']
-    new_abstracts = Preprocessor().transform(abstracts)
+    # NOTE: docs are normalized (courtesy of sklearn); words arent
+    if rerun_embedding:
+        embedding_memory.clear(warn=False)
+    new_abstracts, data, vec = cached_vectorization(abstracts, VECTORIZATION, cache_key=embedding_cache_key(), **vec_kwargs)
 
     # do co-clustering
-    # NOTE: docs are normalized (courtesy of sklearn); words arent
-    data, vec = do_vectorization(new_abstracts, VECTORIZATION, **vec_kwargs)
     model, statistics = do_task_single(data, new_abstracts, vec, alg=ALG, RNG_SEED=RNG_SEED, show_images=SHOW_IMAGES)
     
 